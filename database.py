@@ -0,0 +1,130 @@
+import atexit
+import re
+import threading
+import duckdb
+from pathlib import Path
+from typing import Optional
+
+# Single in-memory DuckDB instance shared by the semantic layer, query executor and
+# logger. Database files are ATTACHed to it, so every tool shares one parquet
+# metadata cache; each tool's view lives in its own schema (see create_table_view).
+# Use cursor() for per-thread connections.
+_shared_con: Optional[duckdb.DuckDBPyConnection] = None
+
+# Attached database files keyed by expanded path -> catalog alias
+_attached: dict[str, str] = {}
+
+_lock = threading.Lock()
+
+# View schemas in the in-memory catalog keyed by (source, table_name) -> schema name
+_view_schemas: dict[tuple[str, str], str] = {}
+
+# Catalog names DuckDB reserves
+_RESERVED_ALIASES = {"memory", "system", "temp", "main"}
+
+
+def _unique_name(name: str, taken: set[str]) -> str:
+    """Make name a valid, unreserved identifier that is not in taken."""
+    base = re.sub(r"\W", "_", name) or "db"
+    if base[0].isdigit() or base.lower() in _RESERVED_ALIASES:
+        base = f"db_{base}"
+
+    unique = base
+    suffix = 2
+    while unique in taken:
+        unique = f"{base}_{suffix}"
+        suffix += 1
+    return unique
+
+
+def get_shared_connection() -> duckdb.DuckDBPyConnection:
+    """Get or create the process-wide in-memory DuckDB connection."""
+    global _shared_con
+
+    with _lock:
+        if _shared_con is None:
+            con = duckdb.connect(":memory:")
+            # Parse each parquet footer once and reuse it across queries
+            con.execute("SET parquet_metadata_cache = true")
+            _shared_con = con
+
+        return _shared_con
+
+
+def attach_database(db_path: str) -> str:
+    """
+    ATTACH a DuckDB database file to the shared connection (once) and return its alias.
+
+    The alias is derived from the file name (e.g. query_logs.duckdb -> query_logs).
+    """
+    expanded_path = str(Path(db_path).expanduser())
+    con = get_shared_connection()
+
+    with _lock:
+        if expanded_path not in _attached:
+            alias = _unique_name(Path(expanded_path).stem, set(_attached.values()) | set(_view_schemas.values()))
+            escaped_path = expanded_path.replace("'", "''")
+            con.execute(f"ATTACH '{escaped_path}' AS {alias}")
+            _attached[expanded_path] = alias
+
+        return _attached[expanded_path]
+
+
+def parquet_source(parquet_path: str, hive_partitioning: bool = False, union_by_name: bool = False) -> str:
+    """
+    FROM-clause expression for a parquet file or glob.
+
+    With hive_partitioning, key=value directory names (e.g. dt=2026-01-09) become
+    columns, and filters on them skip non-matching files. With union_by_name,
+    files written before a column was added read it as NULL instead of failing.
+    """
+    options = []
+    if hive_partitioning:
+        options.append("hive_partitioning = true")
+    if union_by_name:
+        options.append("union_by_name = true")
+    if options:
+        return f"read_parquet('{parquet_path}', {', '.join(options)})"
+    return f"'{parquet_path}'"
+
+
+def create_table_view(con: duckdb.DuckDBPyConnection, table_name: str, source: str) -> None:
+    """
+    Expose a data source under table_name and make it con's default schema.
+
+    LLM-generated SQL refers to the bare table name, so both parquet files and
+    tables in attached databases are reached through a view. Each (source,
+    table_name) gets its own schema in the in-memory catalog, so unqualified
+    names resolve to the tool's own view and tools sharing a table_name do not
+    replace each other's views. This is not isolation: a fully qualified name
+    (e.g. memory.query_log.query_log) still reaches another tool's view.
+
+    The schema is selected with USE before the view is created, so con resolves
+    table_name even if creating the view fails now and is retried later.
+    """
+    with _lock:
+        key = (source, table_name)
+        if key not in _view_schemas:
+            _view_schemas[key] = _unique_name(table_name, set(_attached.values()) | set(_view_schemas.values()))
+        schema = _view_schemas[key]
+
+    con.execute(f"CREATE SCHEMA IF NOT EXISTS memory.{schema}")
+    con.execute(f"USE memory.{schema}")
+    con.execute(f"CREATE OR REPLACE VIEW memory.{schema}.{table_name} AS SELECT * FROM {source}")
+
+
+def close_shared_connection() -> None:
+    """Close the shared connection, checkpointing attached databases."""
+    global _shared_con
+
+    with _lock:
+        if _shared_con is not None:
+            _shared_con.close()
+            _shared_con = None
+            _attached.clear()
+            _view_schemas.clear()
+
+
+# Registered at import so it runs after the handlers of modules that import this one
+# (atexit is LIFO), e.g. the query logger flushing its pending rows.
+atexit.register(close_shared_connection)
@@ -3,11 +3,18 @@ import uuid
 import time
 from pathlib import Path
 from typing import Optional, Callable
-from query_logger import log_attempt
+from database import get_shared_connection, attach_database, create_table_view, parquet_source
+from query_logger import log_attempt_async
+
+# Maximum rows returned to the MCP client per query
+MAX_RESULT_ROWS = 1000
 
 # Connection cache keyed by (db_path or parquet_path, table_name)
 _connections: dict[tuple, duckdb.DuckDBPyConnection] = {}
 
+# Cache keys whose view has been created (it is retried until this succeeds)
+_ready_views: set[tuple] = set()
+
 
 def get_connection(tool_config: dict) -> duckdb.DuckDBPyConnection:
     """
@@ -16,9 +23,11 @@ def get_connection(tool_config: dict) -> duckdb.DuckDBPyConnection:
     Args:
         tool_config: A tool-specific config section (e.g., config["data_query"])
 
-    Supports two modes:
-    - db_path: Connect directly to a DuckDB database file
-    - parquet_path: Create in-memory connection with a view to the parquet file
+    Each tool gets its own cursor on the shared in-memory connection (see
+    database.py) with a view named table_name over its data, in a schema of
+    its own:
+    - db_path: ATTACH the DuckDB database file, view over its table
+    - parquet_path: View over the parquet file or glob (optionally hive-partitioned)
     """
     global _connections
 
@@ -30,30 +39,32 @@ def get_connection(tool_config: dict) -> duckdb.DuckDBPyConnection:
     if db_path:
         db_path = str(Path(db_path).expanduser())
         cache_key = ("db", db_path, table_name)
-
-        if cache_key not in _connections:
-            _connections[cache_key] = duckdb.connect(db_path, read_only=False)
-
-        return _connections[cache_key]
-
-    # Fall back to parquet file with view
-    parquet_path = db_config.get("parquet_path", "")
-    if parquet_path:
+        source = f"{attach_database(db_path)}.{table_name}"
+    else:
+        # Fall back to parquet file with view
+        parquet_path = db_config.get("parquet_path", "")
+        if not parquet_path:
+            raise ValueError("Tool config must specify either 'db_path' or 'parquet_path' in database section")
         parquet_path = str(Path(parquet_path).expanduser())
         cache_key = ("parquet", parquet_path, table_name)
+        source = parquet_source(
+            parquet_path, db_config.get("hive_partitioning", False), db_config.get("union_by_name", False)
+        )
 
-        if cache_key not in _connections:
-            con = duckdb.connect()
-            # Create a view so LLM can reference table name instead of full path
-            con.execute(f"""
-                CREATE OR REPLACE VIEW {table_name} AS 
-                SELECT * FROM '{parquet_path}'
-            """)
-            _connections[cache_key] = con
+    if cache_key not in _connections:
+        _connections[cache_key] = get_shared_connection().cursor()
+    con = _connections[cache_key]
 
-        return _connections[cache_key]
+    if cache_key not in _ready_views:
+        try:
+            # A view lets the LLM reference the table name instead of the source
+            create_table_view(con, table_name, source)
+        except duckdb.Error:
+            # Table or files not there yet (e.g. no queries logged); retry on the next call
+            return con
+        _ready_views.add(cache_key)
 
-    raise ValueError("Tool config must specify either 'db_path' or 'parquet_path' in database section")
+    return con
 
 
 def sanitize_sql(sql: str) -> str:
@@ -71,6 +82,10 @@ def execute_query(sql: str, tool_config: dict) -> dict:
     """
     Execute SQL against the data view and return results with metadata.
 
+    At most MAX_RESULT_ROWS rows are returned. The limit is applied to the query's
+    relation (fetching one extra row to detect truncation), so DuckDB never
+    produces more and the column names are exactly those the SQL produced.
+
     Args:
         sql: SQL query to execute
         tool_config: A tool-specific config section (e.g., config["data_query"])
@@ -81,27 +96,39 @@ def execute_query(sql: str, tool_config: dict) -> dict:
     # Sanitize SQL before execution
     sql = sanitize_sql(sql)
 
-    start_time = time.perf_counter()
+    start_ns = time.perf_counter_ns()
     try:
-        result = con.execute(sql).fetchall()
-        columns = [desc[0] for desc in con.description]
-        execution_time_ms = int((time.perf_counter() - start_time) * 1000)
+        rel = con.sql(sql)
+        if rel is None:
+            # Statement without a result set (already executed by con.sql)
+            columns, result = [], []
+        else:
+            limited = rel.limit(MAX_RESULT_ROWS + 1)
+            columns = limited.columns
+            result = limited.fetchall()
+        execution_time_ms = (time.perf_counter_ns() - start_ns) // 1_000_000
+
+        truncated = len(result) > MAX_RESULT_ROWS
+        if truncated:
+            result = result[:MAX_RESULT_ROWS]
 
         return {
             "success": True,
             "columns": columns,
             "rows": result,
             "row_count": len(result),
+            "truncated": truncated,
             "error": None,
             "execution_time_ms": execution_time_ms
         }
     except Exception as e:
-        execution_time_ms = int((time.perf_counter() - start_time) * 1000)
+        execution_time_ms = (time.perf_counter_ns() - start_ns) // 1_000_000
         return {
             "success": False,
             "columns": None,
             "rows": None,
             "row_count": 0,
+            "truncated": False,
             "error": str(e),
             "execution_time_ms": execution_time_ms
         }
@@ -114,7 +141,7 @@ def execute_with_retry(
         tool_config: dict,
         generate_sql_fn: Callable,
         log_path: str,
-        start_time: float,
+        start_ns: int,
         client_name: str = "unknown",
         user_input: Optional[str] = None
 ) -> dict:
@@ -127,7 +154,7 @@ def execute_with_retry(
         tool_config: A tool-specific config section (e.g., config["data_query"])
         generate_sql_fn: Function to generate SQL from question
         log_path: Path to the query log database
-        start_time: time.perf_counter() when tool was called (for elapsed_ms)
+        start_ns: time.perf_counter_ns() when tool was called (for elapsed_ms)
         client_name: Name of the MCP client
         user_input: Raw input from user in client app (for logging)
     """
@@ -161,9 +188,9 @@ def execute_with_retry(
         # Execute the query
         query_result = execute_query(sql, tool_config)
 
-        # Log this attempt with per-attempt token counts
-        elapsed_ms = int((time.perf_counter() - start_time) * 1000)
-        log_attempt(
+        # Log this attempt with per-attempt token counts (written in the background)
+        elapsed_ms = (time.perf_counter_ns() - start_ns) // 1_000_000
+        log_attempt_async(
             log_path=log_path,
             request_id=request_id,
             attempt_number=attempt + 1,
@@ -174,6 +201,7 @@ def execute_with_retry(
             success=query_result["success"],
             error_message=query_result["error"],
             row_count=query_result["row_count"] if query_result["success"] else None,
+            truncated=query_result["truncated"] if query_result["success"] else None,
             execution_time_ms=query_result["execution_time_ms"],
             input_tokens=attempt_input_tokens,
             output_tokens=attempt_output_tokens,
@@ -188,6 +216,7 @@ def execute_with_retry(
                 "columns": query_result["columns"],
                 "rows": query_result["rows"],
                 "row_count": query_result["row_count"],
+                "truncated": query_result["truncated"],
                 "sql": sql,
                 "retry_count": attempt,
                 "errors": errors,
@@ -202,12 +231,13 @@ def execute_with_retry(
         previous_error = query_result["error"]
 
     # All retries exhausted
-    final_elapsed_ms = int((time.perf_counter() - start_time) * 1000)
+    final_elapsed_ms = (time.perf_counter_ns() - start_ns) // 1_000_000
     return {
         "success": False,
         "columns": None,
         "rows": None,
         "row_count": 0,
+        "truncated": False,
         "sql": sql,
         "retry_count": max_retries,
         "errors": errors,
@@ -223,7 +253,7 @@ if __name__ == "__main__":
 
     config = load_config()
     tool_config = config["data_query"]
-    log_path = config["log_query"]["database"]["db_path"]
+    log_path = config["log_query"]["database"]["log_dir"]
 
     try:
         context = build_semantic_context(tool_config)
@@ -239,7 +269,7 @@ if __name__ == "__main__":
             tool_config,
             generate_sql,
             log_path=log_path,
-            start_time=time.perf_counter(),
+            start_ns=time.perf_counter_ns(),
             client_name="test_harness",
             user_input="how many rows?"
         )
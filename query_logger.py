@@ -1,34 +1,333 @@
+import atexit
+import fcntl
+import json
+import os
+import queue
+import sys
+import threading
+import time
+import uuid
 import duckdb
+import pyarrow as pa
+from concurrent.futures import Future
+from datetime import datetime, timezone
 from typing import Optional
-from datetime import datetime
 from pathlib import Path
+from database import get_shared_connection
 
+# Maximum rows written in a single batch
+_MAX_BATCH_ROWS = 1000
 
-def _init_log_table(con: duckdb.DuckDBPyConnection) -> None:
-    """Create the query_log table if it doesn't exist."""
-    con.execute("""
-        CREATE TABLE IF NOT EXISTS query_log (
-            request_id VARCHAR,
-            attempt_number INTEGER,
-            timestamp TIMESTAMP,
-            client VARCHAR,
-            user_input VARCHAR,
-            nlq VARCHAR,
-            sql VARCHAR,
-            success BOOLEAN,
-            error_message VARCHAR,
-            row_count INTEGER,
-            execution_time_ms INTEGER,
-            input_tokens INTEGER,
-            output_tokens INTEGER,
-            elapsed_ms INTEGER,
-            sql_generator_llm VARCHAR,
-            sql_generating_llm_prompt VARCHAR
-        )
-    """)
+# Files allowed in today's partition before they are merged into one
+_MAX_PARTITION_FILES = 32
 
+# Per-partition lock file taken while compacting (ignored by the *.parquet read glob)
+_COMPACT_LOCK_NAME = ".compact.lock"
 
-def log_attempt(
+# query_log columns in order: (name, DuckDB type, Arrow type). Single source of
+# truth for the batch schema, the written column list and log_table_schema().
+_LOG_COLUMNS = (
+    ("request_id", "VARCHAR", pa.string()),
+    ("attempt_number", "INTEGER", pa.int32()),
+    ("timestamp_ns", "BIGINT", pa.int64()),
+    ("client", "VARCHAR", pa.string()),
+    ("user_input", "VARCHAR", pa.string()),
+    ("nlq", "VARCHAR", pa.string()),
+    ("sql", "VARCHAR", pa.string()),
+    ("success", "BOOLEAN", pa.bool_()),
+    ("error_message", "VARCHAR", pa.string()),
+    ("row_count", "INTEGER", pa.int32()),
+    ("truncated", "BOOLEAN", pa.bool_()),
+    ("execution_time_ms", "INTEGER", pa.int32()),
+    ("input_tokens", "INTEGER", pa.int32()),
+    ("output_tokens", "INTEGER", pa.int32()),
+    ("elapsed_ms", "INTEGER", pa.int32()),
+    ("sql_generator_llm", "VARCHAR", pa.string()),
+    ("sql_generating_llm_prompt", "VARCHAR", pa.string()),
+)
+
+_COLS = tuple(name for name, _, _ in _LOG_COLUMNS)
+_LOG_SCHEMA = pa.schema([(name, arrow_type) for name, _, arrow_type in _LOG_COLUMNS])
+
+# Each batch is appended as new files under <log_dir>/dt=YYYY-MM-DD/ (UTC day), so
+# readers using hive partitioning can skip days outside a dt filter. The writer
+# later merges each day's files into one (see _compact_partition).
+_COPY_SQL = (
+    f"COPY (SELECT {', '.join(_COLS)}, CAST(make_timestamp_ns(timestamp_ns) AS DATE) AS dt FROM _log_batch) "
+    "TO '{log_dir}' (FORMAT parquet, PARTITION_BY (dt), APPEND, FILENAME_PATTERN 'part_{{uuid}}')"
+)
+
+# Persistent log cursors keyed by expanded log directory: (connection, write lock)
+_log_connections: dict[str, tuple[duckdb.DuckDBPyConnection, threading.Lock]] = {}
+_log_connections_lock = threading.Lock()
+
+# Background writers keyed by expanded log directory: (pending row queue, writer thread)
+_log_writers: dict[str, tuple[queue.Queue, threading.Thread]] = {}
+_log_writers_lock = threading.Lock()
+
+
+def log_table_schema() -> list[tuple[str, str]]:
+    """
+    (column name, DuckDB type) pairs of query_log as the log_query tool reads it.
+
+    Includes the dt partition column. Used as log_query's static_schema, so the
+    semantic layer never has to introspect the log files.
+    """
+    return [(name, duckdb_type) for name, duckdb_type, _ in _LOG_COLUMNS] + [("dt", "DATE")]
+
+
+def _get_log_connection(log_path: str) -> tuple[duckdb.DuckDBPyConnection, threading.Lock]:
+    """
+    Get or create the persistent connection used to write a log directory.
+
+    The connection is a cursor on the shared in-memory connection (see database.py).
+    The directory is created if needed. The returned lock must be held while
+    executing statements on the connection.
+    """
+    expanded_path = str(Path(log_path).expanduser())
+
+    with _log_connections_lock:
+        if expanded_path not in _log_connections:
+            Path(expanded_path).mkdir(parents=True, exist_ok=True)
+            con = get_shared_connection().cursor()
+            _log_connections[expanded_path] = (con, threading.Lock())
+
+        return _log_connections[expanded_path]
+
+
+def _write_batch(log_path: str, rows: list[tuple]) -> None:
+    """Append a batch of query_log rows as day-partitioned parquet files."""
+    con, lock = _get_log_connection(log_path)
+
+    columns = list(zip(*rows))
+    batch = pa.Table.from_arrays(
+        [pa.array(values, type=field.type) for values, field in zip(columns, _LOG_SCHEMA)],
+        schema=_LOG_SCHEMA
+    )
+
+    log_dir = str(Path(log_path).expanduser()).replace("'", "''")
+
+    # Not a cached PREPARE: DuckDB binds the registered Arrow table when the
+    # statement is prepared, so re-executing it would re-write the first batch.
+    # Parsing once per batch is already amortised over every row in it.
+    with lock:
+        con.register("_log_batch", batch)
+        try:
+            con.execute(_COPY_SQL.format(log_dir=log_dir))
+        finally:
+            con.unregister("_log_batch")
+
+
+def _recover_compactions(partition_dir: Path) -> None:
+    """
+    Finish or undo compactions of a partition that were interrupted (e.g. by a crash).
+
+    The caller must hold the partition's compaction lock. A manifest that names an
+    existing merged file means the merge was renamed into place, so its inputs
+    are removed; otherwise the merge never landed and only its scratch files go.
+    """
+    for manifest_path in partition_dir.glob(".compact_*.json"):
+        manifest = json.loads(manifest_path.read_text())
+        if (partition_dir / manifest["output"]).exists():
+            for name in manifest["inputs"]:
+                (partition_dir / name).unlink(missing_ok=True)
+        manifest_path.unlink()
+
+    # Partial merges and manifests that never reached their rename
+    for tmp_path in partition_dir.glob(".compact_*.tmp"):
+        tmp_path.unlink(missing_ok=True)
+
+
+def _compact_partition(log_path: str, partition_dir: Path, merge: bool = True) -> None:
+    """
+    Merge the parquet files of one dt= partition into a single file.
+
+    Processes sharing a log directory coordinate through a non-blocking flock on
+    partition_dir/.compact.lock; a partition already being compacted elsewhere
+    is skipped. Under the lock, interrupted compactions are recovered first and
+    the files are listed afresh.
+
+    The inputs are recorded in a manifest before the merged file is written
+    under a name the read glob ignores. It is then renamed into place and the
+    inputs are removed, so readers never miss rows and a crash at any point is
+    finished or undone by the next compaction. Files from before a column was
+    added read it as NULL.
+
+    Args:
+        log_path: Log directory the partition belongs to
+        partition_dir: The dt=YYYY-MM-DD directory
+        merge: False to only recover interrupted compactions
+    """
+    with open(partition_dir / _COMPACT_LOCK_NAME, "a") as lock_file:
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            return
+
+        _recover_compactions(partition_dir)
+
+        files = sorted(partition_dir.glob("*.parquet"))
+        if not merge or len(files) < 2:
+            return
+
+        compaction_id = uuid.uuid4()
+        output_name = f"part_{compaction_id}.parquet"
+        manifest_path = partition_dir / f".compact_{compaction_id}.json"
+        manifest_tmp_path = partition_dir / f".compact_{compaction_id}.json.tmp"
+        tmp_path = partition_dir / f".compact_{compaction_id}.tmp"
+
+        manifest_tmp_path.write_text(json.dumps({"output": output_name, "inputs": [f.name for f in files]}))
+        os.replace(manifest_tmp_path, manifest_path)
+
+        con, lock = _get_log_connection(log_path)
+        file_list = ", ".join("'" + str(f).replace("'", "''") + "'" for f in files)
+        escaped_tmp_path = str(tmp_path).replace("'", "''")
+        # The dt= directory would otherwise be read as a column and stored in the
+        # merged file; batch files from _COPY_SQL carry dt only in the path
+        with lock:
+            con.execute(f"""
+                COPY (
+                    SELECT * FROM read_parquet([{file_list}], hive_partitioning = false, union_by_name = true)
+                    ORDER BY timestamp_ns
+                ) TO '{escaped_tmp_path}' (FORMAT parquet)
+            """)
+
+        os.replace(tmp_path, partition_dir / output_name)
+        for f in files:
+            f.unlink(missing_ok=True)
+        manifest_path.unlink()
+
+
+def _compact_log_dir(log_path: str, include_today: bool) -> None:
+    """
+    Merge each finished day's files (and today's, if include_today) into one file.
+
+    Today's partition is still checked for interrupted compactions. Failures are
+    reported on stderr; the unmerged files stay readable.
+    """
+    today_dir = f"dt={datetime.now(timezone.utc).date().isoformat()}"
+    for partition_dir in sorted(Path(log_path).expanduser().glob("dt=*")):
+        try:
+            _compact_partition(log_path, partition_dir, merge=partition_dir.name < today_dir or include_today)
+        except Exception as e:
+            print(f"query_log compaction of {partition_dir} failed: {e}", file=sys.stderr)
+
+
+def _writer_loop(log_path: str, pending: queue.Queue) -> None:
+    """
+    Drain queued rows for one log directory and write them in batches.
+
+    Each batch takes whatever is already queued (up to _MAX_BATCH_ROWS), so
+    concurrent callers share one write without waiting for a flush timer.
+    A None item stops the writer after the rows queued before it are written.
+
+    Each batch adds files to its day's partition, so the writer also rolls
+    partitions up into one file per day: finished days at startup and when the
+    UTC day changes, today's once it exceeds _MAX_PARTITION_FILES, and all of
+    them when stopping. Startup also recovers interrupted compactions.
+    """
+    _compact_log_dir(log_path, include_today=False)
+    compacted_day = datetime.now(timezone.utc).date()
+
+    stopping = False
+    while not stopping:
+        item = pending.get()
+        if item is None:
+            break
+
+        batch = [item]
+        while len(batch) < _MAX_BATCH_ROWS:
+            try:
+                item = pending.get_nowait()
+            except queue.Empty:
+                break
+            if item is None:
+                stopping = True
+                break
+            batch.append(item)
+
+        # Rows whose future was cancelled while queued are dropped, as an Executor would
+        batch = [(row, future) for row, future in batch if future.set_running_or_notify_cancel()]
+        if batch:
+            try:
+                _write_batch(log_path, [row for row, _ in batch])
+            except Exception as e:
+                for _, future in batch:
+                    future.set_exception(e)
+            else:
+                for _, future in batch:
+                    future.set_result(None)
+
+        today = datetime.now(timezone.utc).date()
+        if today != compacted_day:
+            _compact_log_dir(log_path, include_today=False)
+            compacted_day = today
+
+        today_dir = Path(log_path) / f"dt={today.isoformat()}"
+        if len(list(today_dir.glob("*.parquet"))) > _MAX_PARTITION_FILES:
+            try:
+                _compact_partition(log_path, today_dir)
+            except Exception as e:
+                print(f"query_log compaction of {today_dir} failed: {e}", file=sys.stderr)
+
+    _compact_log_dir(log_path, include_today=True)
+
+
+def _report_write_failure(future: Future) -> None:
+    """Report a failed background write (stdout is reserved for the MCP protocol)."""
+    error = future.exception()
+    if error is not None:
+        print(f"query_log write failed: {error}", file=sys.stderr)
+
+
+def _get_log_writer(log_path: str) -> queue.Queue:
+    """Get the pending row queue for log_path, starting its writer thread if needed."""
+    expanded_path = str(Path(log_path).expanduser())
+
+    with _log_writers_lock:
+        if expanded_path not in _log_writers:
+            pending = queue.Queue()
+            thread = threading.Thread(
+                target=_writer_loop,
+                args=(expanded_path, pending),
+                name=f"query-log-writer:{expanded_path}",
+                daemon=True
+            )
+            thread.start()
+            _log_writers[expanded_path] = (pending, thread)
+
+        return _log_writers[expanded_path][0]
+
+
+def _stop_log_writers() -> None:
+    """Write any queued rows and stop all writer threads."""
+    with _log_writers_lock:
+        for pending, thread in _log_writers.values():
+            pending.put(None)
+        for pending, thread in _log_writers.values():
+            thread.join()
+        _log_writers.clear()
+
+
+def _close_log_connections() -> None:
+    """
+    Flush writers and close all persistent log connections (registered with atexit).
+
+    Runs before database.close_shared_connection, which was registered first.
+    """
+    _stop_log_writers()
+
+    with _log_connections_lock:
+        for con, lock in _log_connections.values():
+            with lock:
+                con.close()
+        _log_connections.clear()
+
+
+atexit.register(_close_log_connections)
+
+
+def log_attempt_async(
         log_path: str,
         request_id: str,
         attempt_number: int,
@@ -39,18 +338,22 @@ def log_attempt(
         success: bool,
         error_message: Optional[str],
         row_count: Optional[int],
+        truncated: Optional[bool],
         execution_time_ms: int,
         input_tokens: int,
         output_tokens: int,
         elapsed_ms: int,
         sql_generator_llm: str,
         sql_generating_llm_prompt: str
-) -> None:
+) -> Future:
     """
-    Log a single query attempt. Opens and closes connection per call.
+    Queue a single query attempt for logging without waiting for the write.
+
+    The row is handed to the background writer for log_path, which batches it
+    with any other pending rows. Write failures are reported on stderr.
 
     Args:
-        log_path: Path to the query log database file
+        log_path: Path to the query log directory (day-partitioned parquet files)
         request_id: UUID grouping retry attempts for a single question
         attempt_number: 1 for initial attempt, 2+ for retries
         client: MCP client name
@@ -59,7 +362,8 @@ def log_attempt(
         sql: Generated SQL
         success: Whether SQL executed without error
         error_message: Database error if failed
-        row_count: Rows returned if successful
+        row_count: Rows returned if successful (at most the executor's row limit)
+        truncated: Whether the result was cut off at the row limit, if successful
         execution_time_ms: Query execution time
         input_tokens: Tokens sent to LLM for this attempt
         output_tokens: Tokens received from LLM for this attempt
@@ -67,45 +371,86 @@ def log_attempt(
         sql_generator_llm: LLM model used to generate the SQL
         sql_generating_llm_prompt: Full prompt sent to the SQL-generating LLM
     """
-    expanded_path = str(Path(log_path).expanduser())
+    # Positional, in _COLS order
+    row = (
+        request_id,
+        attempt_number,
+        time.time_ns(),
+        client,
+        user_input,
+        nlq,
+        sql,
+        success,
+        error_message,
+        row_count,
+        truncated,
+        execution_time_ms,
+        input_tokens,
+        output_tokens,
+        elapsed_ms,
+        sql_generator_llm,
+        sql_generating_llm_prompt
+    )
 
-    con = duckdb.connect(expanded_path)
-    try:
-        _init_log_table(con)
-        con.execute("""
-            INSERT INTO query_log (
-                request_id, attempt_number, timestamp, client, user_input, nlq, sql,
-                success, error_message, row_count, execution_time_ms,
-                input_tokens, output_tokens, elapsed_ms, sql_generator_llm,
-                sql_generating_llm_prompt
-            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        """, [
-            request_id,
-            attempt_number,
-            datetime.now(),
-            client,
-            user_input,
-            nlq,
-            sql,
-            success,
-            error_message,
-            row_count,
-            execution_time_ms,
-            input_tokens,
-            output_tokens,
-            elapsed_ms,
-            sql_generator_llm,
-            sql_generating_llm_prompt
-        ])
-    finally:
-        con.close()
+    # A bare Future rather than ThreadPoolExecutor(max_workers=1).submit: an
+    # executor runs one call per submitted row, so rows could not share a write.
+    # The writer thread drives the Executor side of the protocol for each row
+    # (set_running_or_notify_cancel, then set_result or set_exception).
+    future = Future()
+    future.add_done_callback(_report_write_failure)
+    _get_log_writer(log_path).put((row, future))
+    return future
+
+
+def log_attempt(
+        log_path: str,
+        request_id: str,
+        attempt_number: int,
+        client: str,
+        user_input: Optional[str],
+        nlq: str,
+        sql: str,
+        success: bool,
+        error_message: Optional[str],
+        row_count: Optional[int],
+        truncated: Optional[bool],
+        execution_time_ms: int,
+        input_tokens: int,
+        output_tokens: int,
+        elapsed_ms: int,
+        sql_generator_llm: str,
+        sql_generating_llm_prompt: str
+) -> None:
+    """
+    Log a single query attempt, blocking until the row has been written.
+
+    Takes the same arguments as log_attempt_async.
+    """
+    log_attempt_async(
+        log_path=log_path,
+        request_id=request_id,
+        attempt_number=attempt_number,
+        client=client,
+        user_input=user_input,
+        nlq=nlq,
+        sql=sql,
+        success=success,
+        error_message=error_message,
+        row_count=row_count,
+        truncated=truncated,
+        execution_time_ms=execution_time_ms,
+        input_tokens=input_tokens,
+        output_tokens=output_tokens,
+        elapsed_ms=elapsed_ms,
+        sql_generator_llm=sql_generator_llm,
+        sql_generating_llm_prompt=sql_generating_llm_prompt
+    ).result()
 
 
 if __name__ == "__main__":
     # Quick test
-    import uuid
 
-    test_log_path = "/tmp/test_query_logs.duckdb"
+    test_log_path = "/tmp/test_query_logs"
 
     # Log a test entry
     log_attempt(
@@ -119,6 +464,7 @@ if __name__ == "__main__":
         success=True,
         error_message=None,
         row_count=1,
+        truncated=False,
         execution_time_ms=42,
         input_tokens=150,
         output_tokens=25,
@@ -128,9 +474,12 @@ if __name__ == "__main__":
     )
 
     # Verify it was logged
-    con = duckdb.connect(test_log_path)
+    con = duckdb.connect()
     try:
-        result = con.execute("SELECT * FROM query_log ORDER BY timestamp DESC LIMIT 1").fetchall()
+        result = con.execute(f"""
+            SELECT * FROM read_parquet('{test_log_path}/dt=*/*.parquet', hive_partitioning = true)
+            ORDER BY timestamp_ns DESC LIMIT 1
+        """).fetchall()
         print("Latest log entry:", result)
     finally:
-        con.close()
\ No newline at end of file
+        con.close()
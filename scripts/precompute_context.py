@@ -0,0 +1,35 @@
+"""
+Precompute the formatted semantic context for both tools.
+
+Writes data_context-<fingerprint>.txt and log_context-<fingerprint>.txt to the
+semantic context cache directory. server.py reads these at startup instead of
+introspecting the data sources; it rebuilds live when the fingerprint changes.
+
+Usage:
+    python scripts/precompute_context.py [path/to/config.json]
+"""
+import sys
+from pathlib import Path
+
+# Allow running from any directory
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from semantic_layer import load_config, write_prompt_context
+from query_logger import log_table_schema
+
+
+if __name__ == "__main__":
+    config = load_config(sys.argv[1] if len(sys.argv) > 1 else None)
+    # Same schema server.py supplies, so the fingerprints match
+    config["log_query"]["database"]["static_schema"] = log_table_schema()
+
+    failed = False
+    for tool_key, name in [("data_query", "data"), ("log_query", "log")]:
+        path = write_prompt_context(config[tool_key], name)
+        if path is None:
+            print(f"{tool_key}: context incomplete, not written (server will build it live)")
+            failed = True
+        else:
+            print(f"{tool_key}: wrote {path}")
+
+    sys.exit(1 if failed else 0)
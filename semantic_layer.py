@@ -1,6 +1,50 @@
+import csv
+import glob
+import hashlib
+import io
 import json
+import os
+import re
 import duckdb
+import pyarrow as pa
+import pyarrow.csv as pa_csv
+from database import get_shared_connection, attach_database, create_table_view, parquet_source
 from pathlib import Path
+from typing import Optional
+
+# Semantic contexts are cached here, keyed by a fingerprint of the data source and config
+CONTEXT_CACHE_DIR = Path(os.environ.get("XDG_CACHE_HOME", "~/.cache")).expanduser() / "healthkit-mcp"
+
+# Set to bypass the semantic context cache (e.g. while editing auto_queries)
+NO_CACHE_ENV_VAR = "HEALTHKIT_MCP_NO_CACHE"
+
+# Auto-discovered table names keyed by expanded db_path, reused by fresh tool configs
+_discovered_tables: dict[str, str] = {}
+
+# Bump when the shape of the cached context or the rendered prompt text changes, so
+# sem-*.json and precomputed *_context-*.txt files from older versions are not reused
+_CONTEXT_CACHE_VERSION = 4
+
+# Auto-queries of this shape can be answered from parquet footer statistics
+_SIMPLE_AGGREGATE_RE = re.compile(
+    r"^\s*SELECT\s+(?P<items>.+?)\s+FROM\s+'(?P<path>[^']*)'\s*;?\s*$",
+    re.IGNORECASE | re.DOTALL
+)
+_AGGREGATE_ITEM_RE = re.compile(
+    r'^(?:(?P<count>COUNT)\(\s*\*\s*\)|(?P<func>MIN|MAX)\(\s*"?(?P<column>\w+)"?\s*\))'
+    r'(?:\s+AS\s+(?:\w+|"[^"]+"))?$',
+    re.IGNORECASE
+)
+
+# Column types whose parquet min/max statistics round-trip exactly through TRY_CAST
+_STATS_TYPES = {
+    "TINYINT", "SMALLINT", "INTEGER", "BIGINT", "HUGEINT",
+    "UTINYINT", "USMALLINT", "UINTEGER", "UBIGINT",
+    "FLOAT", "DOUBLE", "DECIMAL", "DATE", "TIMESTAMP"
+}
+
+# DuckDB type ids Arrow's CSV writer cannot render; cast to VARCHAR before fetching
+_CSV_VARCHAR_TYPES = {"list", "array", "struct", "map", "union", "interval", "bit"}
 
 
 def load_config(config_path: str = None) -> dict:
@@ -17,16 +61,21 @@ def _get_data_source(tool_config: dict) -> tuple[duckdb.DuckDBPyConnection, str,
     """
     Determine data source from tool config and return connection, query target, and table name.
 
-    Supports two modes:
-    - db_path: Connect to a DuckDB database file, query tables directly
-    - parquet_path: Connect in-memory, query parquet file by path
+    The connection is a cursor on the shared in-memory connection (see database.py);
+    close it when done. Supports two modes:
+    - db_path: ATTACH the DuckDB database file, query its table as alias.table
+    - parquet_path: Query parquet file (or glob) by path; set hive_partitioning
+      for key=value partition directories
+
+    Either way the source is also exposed as a view named table_name, in a
+    schema of its own that becomes the connection's default (see database.py).
 
     Args:
         tool_config: A tool-specific config section (e.g., config["data_query"])
 
     Returns:
         (connection, query_target, table_name)
-        - query_target: What to use in FROM clause (table name or file path)
+        - query_target: What to use in FROM clause (qualified table name or file path)
         - table_name: The table name for LLM prompts
     """
     db_config = tool_config["database"]
@@ -35,33 +84,310 @@ def _get_data_source(tool_config: dict) -> tuple[duckdb.DuckDBPyConnection, str,
     # Check for DuckDB database file first
     db_path = db_config.get("db_path", "")
     if db_path:
-        db_path = Path(db_path).expanduser()
-        con = duckdb.connect(str(db_path))
+        alias = attach_database(db_path)
+        con = get_shared_connection().cursor()
 
-        # Auto-discover table if not specified
+        # Auto-discover table if not specified (once per database file)
+        expanded_db_path = str(Path(db_path).expanduser())
+        if not table_name:
+            table_name = _discovered_tables.get(expanded_db_path, "")
         if not table_name:
-            tables = con.execute("SHOW TABLES").fetchall()
+            tables = con.execute("""
+                SELECT table_name FROM information_schema.tables
+                WHERE table_catalog = ? AND table_schema = 'main'
+                ORDER BY table_name
+            """, [alias]).fetchall()
             if len(tables) == 1:
                 table_name = tables[0][0]
             elif len(tables) == 0:
+                con.close()
                 raise ValueError(f"No tables found in database: {db_path}")
             else:
+                con.close()
                 table_names = [t[0] for t in tables]
                 raise ValueError(f"Multiple tables found, specify table_name in config: {table_names}")
+            _discovered_tables[expanded_db_path] = table_name
 
-        return con, table_name, table_name
+        query_target = f"{alias}.{table_name}"
+        try:
+            create_table_view(con, table_name, query_target)
+        except duckdb.Error:
+            # Table may not exist yet (e.g. an empty log database); introspection reports it
+            pass
+        return con, query_target, table_name
 
     # Fall back to parquet file
     parquet_path = db_config.get("parquet_path", "")
     if parquet_path:
         parquet_path = str(Path(parquet_path).expanduser())
-        con = duckdb.connect()
+        con = get_shared_connection().cursor()
         table_name = table_name or "data"
-        return con, f"'{parquet_path}'", table_name
+        query_target = parquet_source(
+            parquet_path, db_config.get("hive_partitioning", False), db_config.get("union_by_name", False)
+        )
+        try:
+            create_table_view(con, table_name, query_target)
+        except duckdb.Error:
+            # Glob may not match any files yet (e.g. no queries logged); introspection reports it
+            pass
+        return con, query_target, table_name
 
     raise ValueError("Tool config must specify either 'db_path' or 'parquet_path' in database section")
 
 
+def _parquet_source_path(tool_config: dict) -> Optional[str]:
+    """Return the expanded parquet path if the tool queries a parquet file, else None."""
+    db_config = tool_config["database"]
+    if db_config.get("db_path", "") or not db_config.get("parquet_path", ""):
+        return None
+    return str(Path(db_config["parquet_path"]).expanduser())
+
+
+def _parquet_metadata_query(con: duckdb.DuckDBPyConnection, query: str, parquet_path: str) -> Optional[str]:
+    """
+    Rewrite a simple aggregate over a parquet file to read footer statistics.
+
+    Handles queries of the form SELECT COUNT(*), MIN(col), MAX(col) FROM '<parquet_path>'
+    so they don't scan the file. Returns None when the query has any other shape or
+    the file lacks exact statistics for a referenced column; run the original then.
+    The rewrite keeps the original query's column names and types.
+    """
+    match = _SIMPLE_AGGREGATE_RE.match(query)
+    if not match or match.group("path") != parquet_path:
+        return None
+
+    items = [item.strip() for item in match.group("items").split(",")]
+    item_matches = [_AGGREGATE_ITEM_RE.match(item) for item in items]
+    if not all(item_matches):
+        return None
+
+    # Binding the original query is cheap and gives the exact result names and types
+    described = con.execute(f"DESCRIBE {query}").fetchall()
+    metadata = f"parquet_metadata('{parquet_path}')"
+
+    select_items = []
+    stats_columns = []
+    for item_match, (name, col_type, *_) in zip(item_matches, described):
+        if item_match.group("count"):
+            expr = (
+                f"(SELECT COALESCE(SUM(row_group_num_rows), 0) FROM "
+                f"(SELECT DISTINCT file_name, row_group_id, row_group_num_rows FROM {metadata}))"
+            )
+        elif col_type.split("(")[0] in _STATS_TYPES:
+            func = item_match.group("func").lower()
+            column = item_match.group("column")
+            stats_columns.append(column.lower())
+            expr = (
+                f"(SELECT {func}(TRY_CAST(stats_{func}_value AS {col_type})) FROM {metadata} "
+                f"WHERE lower(path_in_schema) = '{column.lower()}')"
+            )
+        else:
+            return None
+
+        quoted_name = name.replace('"', '""')
+        select_items.append(f'CAST({expr} AS {col_type}) AS "{quoted_name}"')
+
+    if stats_columns:
+        # Every row group needs exact stats, unless it is entirely NULL for the column
+        column_list = ", ".join(f"'{c}'" for c in stats_columns)
+        missing_stats = con.execute(f"""
+            SELECT COUNT(*) FROM {metadata}
+            WHERE lower(path_in_schema) IN ({column_list})
+              AND ((stats_min_value IS NULL OR stats_max_value IS NULL)
+                   AND stats_null_count IS DISTINCT FROM row_group_num_rows
+                   OR NOT COALESCE(min_is_exact, TRUE)
+                   OR NOT COALESCE(max_is_exact, TRUE))
+        """).fetchone()[0]
+        if missing_stats:
+            return None
+
+    return "SELECT " + ", ".join(select_items)
+
+
+def _introspect_columns(
+        con: duckdb.DuckDBPyConnection,
+        query_target: str,
+        parquet_path: Optional[str]
+) -> list[tuple[str, str]]:
+    """
+    Return (column_name, column_type) pairs for the query target.
+
+    Reads the catalog (information_schema) for database tables and the file
+    footer (parquet_schema) for a single flat parquet file, which avoids
+    planning a full SELECT. Falls back to DESCRIBE for anything else.
+    """
+    try:
+        if parquet_path is None:
+            catalog, _, table = query_target.rpartition(".")
+            columns = con.execute("""
+                SELECT column_name, data_type FROM information_schema.columns
+                WHERE table_catalog = COALESCE(NULLIF(?, ''), current_database())
+                  AND table_schema = 'main' AND table_name = ?
+                ORDER BY ordinal_position
+            """, [catalog, table]).fetchall()
+        elif not any(c in parquet_path for c in "*?["):
+            schema_rows = con.execute(f"""
+                SELECT name, duckdb_type, num_children FROM parquet_schema('{parquet_path}')
+            """).fetchall()
+            # First row is the schema root; nested columns need DESCRIBE to render their type
+            leaves = schema_rows[1:]
+            columns = [] if any(r[1] is None or r[2] for r in leaves) else [(r[0], r[1]) for r in leaves]
+        else:
+            columns = []
+        if columns:
+            return columns
+    except duckdb.Error:
+        pass
+
+    return [(col[0], col[1]) for col in con.execute(f"DESCRIBE SELECT * FROM {query_target}").fetchall()]
+
+
+def _csv_compatible(rel: duckdb.DuckDBPyRelation) -> duckdb.DuckDBPyRelation:
+    """
+    Cast columns Arrow's CSV writer rejects (nested, interval, bit) to VARCHAR.
+
+    Columns are referenced by position and keep their original names, so
+    duplicate output names survive. Other relations are returned unchanged.
+    """
+    if not any(col_type.id in _CSV_VARCHAR_TYPES for col_type in rel.types):
+        return rel
+
+    items = []
+    for position, (name, col_type) in enumerate(zip(rel.columns, rel.types), start=1):
+        quoted_name = name.replace('"', '""')
+        expr = f"CAST(#{position} AS VARCHAR)" if col_type.id in _CSV_VARCHAR_TYPES else f"#{position}"
+        items.append(f'{expr} AS "{quoted_name}"')
+    return rel.project(", ".join(items))
+
+
+def _arrow_to_csv(reader: pa.RecordBatchReader) -> str:
+    """
+    Render query results as CSV rows (no header) using Arrow's writer.
+
+    Record batches are streamed into the writer, so the full result is never
+    materialised as Python rows or as one Arrow table. Strings are quoted with
+    embedded quotes doubled, NULLs are empty and other values are written unquoted.
+    """
+    buffer = io.BytesIO()
+    with pa_csv.CSVWriter(buffer, reader.schema, write_options=pa_csv.WriteOptions(include_header=False)) as writer:
+        for batch in reader:
+            writer.write_batch(batch)
+    return buffer.getvalue().decode("utf-8").rstrip("\n")
+
+
+def _csv_header(columns: list[str]) -> str:
+    """Render column names as a CSV header line, quoting only names that need it."""
+    buffer = io.StringIO()
+    csv.writer(buffer, quoting=csv.QUOTE_MINIMAL, lineterminator="").writerow(columns)
+    return buffer.getvalue()
+
+
+def _format_hints(hints: list[str], hint_style: str) -> list[str]:
+    """Render static hints as prompt lines (SQL comments for the sql_comment style)."""
+    if hint_style == "sql_comment":
+        return [f"-- {hint}" for hint in hints]
+    return list(hints)
+
+
+def _context_fingerprint(tool_config: dict) -> str:
+    """
+    Fingerprint everything build_semantic_context depends on.
+
+    Covers the database, semantic_layer and llm.prompt_format config sections plus the
+    name, mtime and size of every file the data source matches (a path or a glob)
+    and of any existing file quoted in an auto-query (e.g. read_csv_auto('classes.csv')).
+    With a static_schema and no auto-queries the context never reads the data, so
+    the data source files are left out.
+    """
+    db_config = tool_config["database"]
+    semantic_config = tool_config["semantic_layer"]
+    prompt_format = tool_config["llm"].get("prompt_format", {})
+    auto_queries = semantic_config.get("auto_queries", [])
+
+    digest = hashlib.sha256()
+    digest.update(f"v{_CONTEXT_CACHE_VERSION}".encode())
+    digest.update(json.dumps([db_config, semantic_config, prompt_format], sort_keys=True).encode())
+
+    paths = []
+    if auto_queries or not db_config.get("static_schema"):
+        paths.append(db_config.get("db_path", "") or db_config.get("parquet_path", ""))
+    for query_config in auto_queries:
+        query_template = query_config if isinstance(query_config, str) else query_config["query"]
+        paths.extend(re.findall(r"'([^']+)'", query_template))
+
+    for path in paths:
+        if not path:
+            continue
+        expanded_path = str(Path(path).expanduser())
+        if any(c in expanded_path for c in "*?["):
+            digest.update(f"glob:{expanded_path}".encode())
+            matches = sorted(glob.glob(expanded_path))
+        else:
+            matches = [expanded_path]
+
+        for match in matches:
+            try:
+                stat = os.stat(match)
+            except OSError:
+                digest.update(f"{match}:missing".encode())
+                continue
+            if Path(match).is_file():
+                digest.update(f"{match}:{stat.st_mtime_ns}:{stat.st_size}".encode())
+
+    return digest.hexdigest()[:16]
+
+
+def _context_source_key(tool_config: dict) -> str:
+    """
+    Short, stable key for a tool's data source, used to group its cache files.
+
+    Unlike the fingerprint it ignores file contents and the rest of the config,
+    so a rebuilt context can replace the files it supersedes.
+    """
+    db_config = tool_config["database"]
+    source = [db_config.get("db_path", ""), db_config.get("parquet_path", ""), db_config.get("table_name", "")]
+    return hashlib.sha256(json.dumps(source).encode()).hexdigest()[:8]
+
+
+def _prune_cache_files(pattern: str, keep: Path) -> None:
+    """Remove cache files matching pattern other than keep (best effort)."""
+    for path in CONTEXT_CACHE_DIR.glob(pattern):
+        if path != keep:
+            try:
+                path.unlink()
+            except OSError:
+                pass
+
+
+def _read_context_cache(cache_path: Path) -> Optional[dict]:
+    """Load a cached semantic context, or None if missing or unreadable."""
+    try:
+        with open(cache_path, "r") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _atomic_write_text(path: Path, text: str) -> bool:
+    """Atomically write text to a cache file (best effort). Returns True on success."""
+    tmp_path = path.with_suffix(f".{os.getpid()}.tmp")
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path.write_text(text)
+        os.replace(tmp_path, path)
+        return True
+    except OSError:
+        tmp_path.unlink(missing_ok=True)
+        return False
+
+
+def _is_complete_context(context: dict) -> bool:
+    """True if schema introspection and every auto-query succeeded."""
+    introspection_ok = bool(context["column_info"])
+    auto_queries_ok = not any("error" in r for r in context["auto_query_results"])
+    return introspection_ok and auto_queries_ok
+
+
 def build_semantic_context(tool_config: dict) -> dict:
     """
     Build semantic context with automatic schema introspection.
@@ -71,11 +397,54 @@ def build_semantic_context(tool_config: dict) -> dict:
 
     Returns a dict with separate components that llm_client can assemble
     into the optimal prompt structure for the configured LLM.
+
+    Results are cached on disk under CONTEXT_CACHE_DIR, keyed by a fingerprint
+    of the data source and config; a new entry replaces the source's older ones.
+    Set HEALTHKIT_MCP_NO_CACHE to bypass.
+
+    If database.static_schema lists [column_name, column_type] pairs, they are
+    used as the schema instead of introspecting the source.
     """
 
+    use_cache = not os.environ.get(NO_CACHE_ENV_VAR)
+    if use_cache:
+        source_key = _context_source_key(tool_config)
+        cache_path = CONTEXT_CACHE_DIR / f"sem-{source_key}-{_context_fingerprint(tool_config)}.json"
+        cached = _read_context_cache(cache_path)
+        if cached is not None:
+            tool_config["database"]["table_name"] = cached["table_name"]
+            return cached["context"]
+
+    context = _introspect_semantic_context(tool_config)
+
+    # Only cache complete contexts, so transient failures are retried next start
+    if use_cache and _is_complete_context(context):
+        written = _atomic_write_text(cache_path, json.dumps({
+            "table_name": tool_config["database"]["table_name"],
+            "context": context
+        }))
+        # Contexts for older fingerprints of this source are never read again, nor
+        # are entries named without a source key (sem-<fingerprint>.json)
+        if written:
+            _prune_cache_files(f"sem-{source_key}-*.json", keep=cache_path)
+            _prune_cache_files("sem-" + "[0-9a-f]" * 16 + ".json", keep=cache_path)
+
+    return context
+
+
+def _introspect_semantic_context(tool_config: dict) -> dict:
+    """Build the semantic context by querying the data source (no caching)."""
+
     prompt_format = tool_config["llm"].get("prompt_format", {})
+    static_schema = tool_config["database"].get("static_schema")
+    auto_queries = tool_config["semantic_layer"].get("auto_queries", [])
 
-    con, query_target, table_name = _get_data_source(tool_config)
+    # A known schema with nothing to query needs no connection at all
+    con = None
+    table_name = tool_config["database"].get("table_name", "")
+    if not (static_schema and table_name and not auto_queries):
+        con, query_target, table_name = _get_data_source(tool_config)
+    parquet_path = _parquet_source_path(tool_config)
 
     # Update config with discovered table name (for downstream use)
     tool_config["database"]["table_name"] = table_name
@@ -86,29 +455,20 @@ def build_semantic_context(tool_config: dict) -> dict:
         "hints": []
     }
 
-    # 1. Auto-introspect schema and generate DDL
+    # 1. Use the configured schema, or auto-introspect it, and generate DDL
     try:
-        schema_query = f"DESCRIBE SELECT * FROM {query_target}"
-        columns = con.execute(schema_query).fetchall()
-
-        ddl_lines = [f"CREATE TABLE {table_name} ("]
-        context["column_info"] = []
-
-        for i, col in enumerate(columns):
-            col_name = col[0]
-            col_type = col[1]
-            context["column_info"].append({"name": col_name, "type": col_type})
-
-            comma = "," if i < len(columns) - 1 else ""
-            ddl_lines.append(f"    {col_name} {col_type}{comma}")
+        if static_schema:
+            columns = [(col_name, col_type) for col_name, col_type in static_schema]
+        else:
+            columns = _introspect_columns(con, query_target, parquet_path)
 
-        ddl_lines.append(");")
-        context["schema_ddl"] = "\n".join(ddl_lines)
+        context["column_info"] = [{"name": col_name, "type": col_type} for col_name, col_type in columns]
+        body = ",\n".join(f"    {col_name} {col_type}" for col_name, col_type in columns)
+        context["schema_ddl"] = f"CREATE TABLE {table_name} (\n{body}\n);"
     except Exception as e:
         context["schema_ddl"] = f"-- Schema introspection failed: {e}"
 
     # 2. Run any custom auto-queries from config
-    auto_queries = tool_config["semantic_layer"].get("auto_queries", [])
     context["auto_query_results"] = []
     for query_config in auto_queries:
         # Support both string (legacy) and dict format
@@ -123,14 +483,17 @@ def build_semantic_context(tool_config: dict) -> dict:
             query = query_template.replace("{query_target}", query_target).replace("{table_name}", table_name)
             # Also support legacy placeholder
             query = query.replace("{parquet_path}", query_target)
-            cursor = con.execute(query)
-            columns = [desc[0] for desc in cursor.description]
-            rows = cursor.fetchall()
+            if parquet_path:
+                # COUNT/MIN/MAX over the whole file can come from the parquet footer
+                query = _parquet_metadata_query(con, query, parquet_path) or query
+            rel = _csv_compatible(con.sql(query))
+            columns = rel.columns
+            csv_rows = _arrow_to_csv(rel.to_arrow_reader())
             context["auto_query_results"].append({
                 "query": query_template,
                 "label": label,
                 "columns": columns,
-                "rows": rows
+                "csv": csv_rows
             })
         except Exception as e:
             context["auto_query_results"].append({
@@ -139,10 +502,13 @@ def build_semantic_context(tool_config: dict) -> dict:
                 "error": str(e)
             })
 
-    # 3. Add static hints from config
+    # 3. Add static hints from config, pre-formatted for the configured hint style
     context["hints"] = tool_config["semantic_layer"].get("static_context", [])
+    context["hint_style"] = prompt_format.get("hint_style", "sql_comment")
+    context["formatted_hints"] = _format_hints(context["hints"], context["hint_style"])
 
-    con.close()
+    if con is not None:
+        con.close()
     return context
 
 
@@ -179,33 +545,69 @@ def format_context_for_prompt(context: dict, tool_config: dict = None) -> str:
                 # Use label if provided, otherwise generic header
                 label = result.get("label") or "Auto Query Result"
                 parts.append(f"\n/* {label} */")
-                columns = result["columns"]
-                rows = result["rows"]
-                parts.append(",".join(columns))
-                for row in rows:
-                    csv_values = []
-                    for val in row:
-                        if val is None:
-                            csv_values.append("")
-                        elif isinstance(val, str):
-                            escaped = val.replace('"', '""')
-                            csv_values.append(f'"{escaped}"')
-                        else:
-                            csv_values.append(str(val))
-                    parts.append(",".join(csv_values))
-
-    # Domain hints
+                parts.append(_csv_header(result["columns"]))
+                if result["csv"]:
+                    parts.append(result["csv"])
+
+    # Domain hints (formatted at build time unless a different style is requested)
     if context.get("hints"):
         parts.append("\n/* Important Notes */")
-        for hint in context["hints"]:
-            if hint_style == "sql_comment":
-                parts.append(f"-- {hint}")
-            else:
-                parts.append(hint)
+        if context.get("hint_style") == hint_style:
+            parts.extend(context["formatted_hints"])
+        else:
+            parts.extend(_format_hints(context["hints"], hint_style))
 
     return "\n".join(parts)
 
 
+def prompt_context_path(tool_config: dict, name: str) -> Path:
+    """
+    Path of the precomputed prompt context for a tool (e.g. name="data").
+
+    The file name carries the semantic context fingerprint (which covers the
+    prompt format), so a config or data change points at a new file instead of
+    a stale one.
+    """
+    return CONTEXT_CACHE_DIR / f"{name}_context-{_context_fingerprint(tool_config)}.txt"
+
+
+def write_prompt_context(tool_config: dict, name: str) -> Optional[Path]:
+    """
+    Build and format a tool's prompt context and save it for load_prompt_context.
+
+    Returns the written path, or None if the context was incomplete (failed
+    introspection or auto-queries) or could not be written. Files written for
+    the tool's older fingerprints are removed.
+    """
+    # Fingerprint before building, which fills in a discovered table_name
+    path = prompt_context_path(tool_config, name)
+    context = build_semantic_context(tool_config)
+    if not _is_complete_context(context):
+        return None
+    if not _atomic_write_text(path, format_context_for_prompt(context, tool_config)):
+        return None
+    _prune_cache_files(f"{name}_context-*.txt", keep=path)
+    return path
+
+
+def load_prompt_context(tool_config: dict, name: str) -> str:
+    """
+    Return a tool's formatted prompt context, preferring a precomputed file.
+
+    Files are written by scripts/precompute_context.py. The live build is used when
+    no file matches the current fingerprint, when table_name is not configured
+    (discovering it needs the database) or when HEALTHKIT_MCP_NO_CACHE is set.
+    """
+    if not os.environ.get(NO_CACHE_ENV_VAR) and tool_config["database"].get("table_name"):
+        try:
+            return prompt_context_path(tool_config, name).read_text()
+        except OSError:
+            pass
+
+    context = build_semantic_context(tool_config)
+    return format_context_for_prompt(context, tool_config)
+
+
 if __name__ == "__main__":
     # Test the semantic layer for both tools
     config = load_config()
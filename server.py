@@ -1,8 +1,9 @@
 import time
 from typing import Optional
 from mcp.server.fastmcp import FastMCP, Context
-from semantic_layer import load_config, build_semantic_context, format_context_for_prompt
+from semantic_layer import load_config, load_prompt_context
 from query_executor import execute_with_retry
+from query_logger import log_table_schema
 from llm_client import generate_sql
 
 # Initialize MCP server
@@ -11,18 +12,18 @@ mcp = FastMCP("healthkit")
 # Load config
 config = load_config()
 
-# Get log path (used by both tools for logging)
-log_path = config["log_query"]["database"]["db_path"]
+# Get log directory (used by both tools for logging)
+log_path = config["log_query"]["database"]["log_dir"]
 
-# Build semantic context for data_query tool at startup
+# Load semantic context for data_query tool at startup (precomputed file or live build)
 data_tool_config = config["data_query"]
-data_semantic_context_data = build_semantic_context(data_tool_config)
-data_semantic_context = format_context_for_prompt(data_semantic_context_data, data_tool_config)
+data_semantic_context = load_prompt_context(data_tool_config, "data")
 
-# Build semantic context for log_query tool at startup
+# Load semantic context for log_query tool at startup (precomputed file or live build).
+# Its schema comes from the logger, so the log files are never introspected.
 log_tool_config = config["log_query"]
-log_semantic_context_data = build_semantic_context(log_tool_config)
-log_semantic_context = format_context_for_prompt(log_semantic_context_data, log_tool_config)
+log_tool_config["database"]["static_schema"] = log_table_schema()
+log_semantic_context = load_prompt_context(log_tool_config, "log")
 
 
 def _get_client_name(ctx: Context) -> str:
@@ -38,8 +39,9 @@ def _format_result(result: dict) -> dict:
     return {
         "success": result["success"],
         "columns": result["columns"],
-        "rows": result["rows"][:1000] if result["rows"] else None,  # Limit rows returned
+        "rows": result["rows"] or None,  # Already limited to MAX_RESULT_ROWS by the executor
         "row_count": result["row_count"],
+        "truncated": result["truncated"],
         "diagnostics": {
             "sql": result["sql"],
             "retry_count": result["retry_count"],
@@ -70,7 +72,7 @@ def query_data(question: str, user_input: Optional[str] = None, ctx: Context = N
     - "Austin" → start_lat BETWEEN 30.1 AND 30.5 AND start_lon BETWEEN -97.9 AND -97.5
     - "New York City" → start_lat BETWEEN 40.5 AND 40.9 AND start_lon BETWEEN -74.3 AND -73.7
     """
-    start_time = time.perf_counter()
+    start_ns = time.perf_counter_ns()
     client_name = _get_client_name(ctx)
 
     result = execute_with_retry(
@@ -79,7 +81,7 @@ def query_data(question: str, user_input: Optional[str] = None, ctx: Context = N
         data_tool_config,
         generate_sql,
         log_path=log_path,
-        start_time=start_time,
+        start_ns=start_ns,
         client_name=client_name,
         user_input=user_input
     )
@@ -102,19 +104,20 @@ def query_logs(question: str, user_input: Optional[str] = None, ctx: Context = N
     The query_log table tracks all NLQ-to-SQL attempts with:
     - request_id: Groups retry attempts for a single question
     - attempt_number: 1 = initial, 2+ = retry
-    - timestamp: When the attempt occurred
+    - timestamp_ns: When the attempt occurred (epoch nanoseconds, UTC)
     - client: MCP client name
     - user_input: Raw input from user in client app
     - nlq: Natural language question passed to tool
     - sql: Generated SQL
     - success: Whether SQL executed without error
     - error_message: Database error if failed
-    - row_count: Rows returned if successful
+    - row_count: Rows returned if successful (at most 1000)
+    - truncated: Whether the result was cut off at 1000 rows
     - execution_time_ms: Query execution time
     - input_tokens, output_tokens: LLM token usage
     - elapsed_ms: Cumulative time since tool was called
     """
-    start_time = time.perf_counter()
+    start_ns = time.perf_counter_ns()
     client_name = _get_client_name(ctx)
 
     result = execute_with_retry(
@@ -123,7 +126,7 @@ def query_logs(question: str, user_input: Optional[str] = None, ctx: Context = N
         log_tool_config,
         generate_sql,
         log_path=log_path,
-        start_time=start_time,
+        start_ns=start_ns,
         client_name=client_name,
         user_input=user_input
     )
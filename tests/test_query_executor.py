@@ -0,0 +1,69 @@
+import duckdb
+import pytest
+import query_executor
+import query_logger
+
+
+@pytest.fixture
+def tool_config(tmp_path):
+    """A parquet-backed tool whose table holds exactly MAX_RESULT_ROWS + 1 rows."""
+    path = tmp_path / "rows.parquet"
+    con = duckdb.connect()
+    try:
+        con.execute(f"COPY (SELECT range AS id FROM range({query_executor.MAX_RESULT_ROWS + 1})) TO '{path}' (FORMAT parquet)")
+    finally:
+        con.close()
+    return {"database": {"parquet_path": str(path), "table_name": "numbers"}}
+
+
+@pytest.mark.parametrize("rows, truncated", [
+    (query_executor.MAX_RESULT_ROWS - 1, False),
+    (query_executor.MAX_RESULT_ROWS, False),
+    (query_executor.MAX_RESULT_ROWS + 1, True),
+])
+def test_results_are_truncated_only_past_the_limit(tool_config, rows, truncated):
+    result = query_executor.execute_query(f"SELECT id FROM numbers WHERE id < {rows} ORDER BY id", tool_config)
+
+    assert result["success"], result["error"]
+    assert result["truncated"] is truncated
+    assert result["row_count"] == min(rows, query_executor.MAX_RESULT_ROWS)
+    assert result["rows"] == [(i,) for i in range(result["row_count"])]
+
+
+def test_duplicate_column_names_are_kept(tool_config):
+    result = query_executor.execute_query(
+        "SELECT a.id, b.id, count(*), count(*) FROM numbers a JOIN numbers b USING (id) GROUP BY ALL LIMIT 1",
+        tool_config
+    )
+
+    assert result["success"], result["error"]
+    assert result["columns"] == ["id", "id", "count_star()", "count_star()"]
+
+
+def test_statement_without_result_set(tool_config):
+    result = query_executor.execute_query("CREATE TEMP TABLE scratch (x INTEGER)", tool_config)
+
+    assert result["success"], result["error"]
+    assert (result["columns"], result["rows"], result["truncated"]) == ([], [], False)
+
+
+def test_truncation_is_logged(tool_config, tmp_path):
+    tool_config["llm"] = {"model": "test/model"}
+    tool_config["database"]["max_retries"] = 0
+
+    def generate_sql(question, semantic_context, tool_config, previous_sql=None, previous_error=None):
+        return {"sql": "SELECT id FROM numbers", "input_tokens": 1, "output_tokens": 1, "prompt": "prompt"}
+
+    log_dir = tmp_path / "logs"
+    result = query_executor.execute_with_retry(
+        "all rows", "", tool_config, generate_sql, log_path=str(log_dir), start_ns=0
+    )
+    query_logger._stop_log_writers()
+
+    assert result["truncated"]
+    con = duckdb.connect()
+    try:
+        logged = con.execute(f"SELECT row_count, truncated FROM read_parquet('{log_dir}/dt=*/*.parquet')").fetchall()
+    finally:
+        con.close()
+    assert logged == [(query_executor.MAX_RESULT_ROWS, True)]
@@ -0,0 +1,223 @@
+import json
+import subprocess
+import sys
+import threading
+import time
+from pathlib import Path
+import duckdb
+import query_logger
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+
+# 2000-01-01T12:00:00Z, a finished day for every test run
+OLD_DAY_NS = 946_728_000 * 1_000_000_000
+
+
+def _attempt(log_dir, request_id: str, **overrides) -> dict:
+    """Keyword arguments for one log_attempt call."""
+    attempt = dict(
+        log_path=str(log_dir),
+        request_id=request_id,
+        attempt_number=1,
+        client="test",
+        user_input="how many rows?",
+        nlq="How many rows in the table?",
+        sql="SELECT COUNT(*) FROM data",
+        success=True,
+        error_message=None,
+        row_count=1,
+        truncated=False,
+        execution_time_ms=42,
+        input_tokens=150,
+        output_tokens=25,
+        elapsed_ms=500,
+        sql_generator_llm="test/model:7b",
+        sql_generating_llm_prompt="prompt"
+    )
+    attempt.update(overrides)
+    return attempt
+
+
+def _row(request_id: str, timestamp_ns: int) -> tuple:
+    """A query_log row in _COLS order, as the writer receives it."""
+    values = _attempt(None, request_id)
+    values["timestamp_ns"] = timestamp_ns
+    return tuple(values[name] for name in query_logger._COLS)
+
+
+def _write_files(log_dir, count: int, prefix: str = "r") -> Path:
+    """Write count single-row files into the 2000-01-01 partition and return it."""
+    for i in range(count):
+        query_logger._write_batch(str(log_dir), [_row(f"{prefix}{i}", OLD_DAY_NS + i)])
+    return Path(log_dir) / "dt=2000-01-01"
+
+
+def _read_logs(log_dir, columns: str = "*") -> list[tuple]:
+    # Stop the writers (they restart on demand) so no compaction runs during the read
+    query_logger._stop_log_writers()
+    con = duckdb.connect()
+    try:
+        return con.execute(f"""
+            SELECT {columns} FROM read_parquet('{log_dir}/dt=*/*.parquet', hive_partitioning = true, union_by_name = true)
+            ORDER BY timestamp_ns
+        """).fetchall()
+    finally:
+        con.close()
+
+
+def _count_rows(log_dir) -> tuple[int, int]:
+    """(rows, distinct request_ids) across all log files."""
+    request_ids = [row[0] for row in _read_logs(log_dir, "request_id")]
+    return len(request_ids), len(set(request_ids))
+
+
+def test_log_attempt_round_trip(tmp_path):
+    before_ns = time.time_ns()
+    query_logger.log_attempt(**_attempt(tmp_path, "r1", success=False, error_message="boom", row_count=None))
+
+    rows = _read_logs(tmp_path, "request_id, success, error_message, row_count, timestamp_ns, "
+                                "dt = CAST(make_timestamp_ns(timestamp_ns) AS DATE)")
+    assert len(rows) == 1
+    request_id, success, error_message, row_count, timestamp_ns, dt_matches = rows[0]
+    assert (request_id, success, error_message, row_count) == ("r1", False, "boom", None)
+    assert before_ns <= timestamp_ns <= time.time_ns()
+    assert dt_matches
+
+
+def test_concurrent_attempts_are_all_written(tmp_path):
+    futures = []
+    futures_lock = threading.Lock()
+
+    def log_many(thread_id: int) -> None:
+        for i in range(10):
+            future = query_logger.log_attempt_async(**_attempt(tmp_path, f"t{thread_id}-{i}"))
+            with futures_lock:
+                futures.append(future)
+
+    threads = [threading.Thread(target=log_many, args=(t,)) for t in range(5)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    for future in futures:
+        assert future.result(timeout=10) is None
+
+    request_ids = [row[0] for row in _read_logs(tmp_path, "request_id")]
+    assert sorted(request_ids) == sorted(f"t{t}-{i}" for t in range(5) for i in range(10))
+
+
+def test_cancelled_attempt_is_not_written(tmp_path):
+    # Hold the write lock so the first row stalls inside the writer
+    _, lock = query_logger._get_log_connection(str(tmp_path))
+    with lock:
+        first = query_logger.log_attempt_async(**_attempt(tmp_path, "first"))
+        while not first.running():
+            time.sleep(0.001)
+        cancelled = query_logger.log_attempt_async(**_attempt(tmp_path, "cancelled"))
+        assert cancelled.cancel()
+
+    first.result(timeout=10)
+    query_logger.log_attempt(**_attempt(tmp_path, "last"))
+
+    assert [row[0] for row in _read_logs(tmp_path, "request_id")] == ["first", "last"]
+
+
+def test_today_partition_is_compacted_with_a_single_schema(tmp_path):
+    # Waiting on each row gives one batch, and so one file, per attempt
+    for i in range(query_logger._MAX_PARTITION_FILES + 8):
+        query_logger.log_attempt(**_attempt(tmp_path, f"r{i}"))
+
+    rows = _read_logs(tmp_path, "request_id")
+    assert sorted(r[0] for r in rows) == sorted(f"r{i}" for i in range(query_logger._MAX_PARTITION_FILES + 8))
+
+    files = list(tmp_path.glob("dt=*/*.parquet"))
+    assert len(files) == 1
+    # dt lives only in the directory name, as in files written by _COPY_SQL
+    con = duckdb.connect()
+    try:
+        columns = [c[0] for c in con.execute(f"DESCRIBE SELECT * FROM read_parquet('{files[0]}', hive_partitioning = false)").fetchall()]
+    finally:
+        con.close()
+    assert columns == list(query_logger._COLS)
+
+
+def test_finished_day_is_compacted_at_startup(tmp_path):
+    partition_dir = _write_files(tmp_path, 5)
+    # A file from before the truncated column existed
+    con = duckdb.connect()
+    try:
+        con.execute(f"COPY (SELECT 'legacy' AS request_id, {OLD_DAY_NS - 1}::BIGINT AS timestamp_ns) "
+                    f"TO '{partition_dir}/part_legacy.parquet' (FORMAT parquet)")
+    finally:
+        con.close()
+
+    query_logger.log_attempt(**_attempt(tmp_path, "today"))
+    query_logger._stop_log_writers()
+    assert len(list(partition_dir.glob("*.parquet"))) == 1
+
+    rows = _read_logs(tmp_path, "request_id, truncated")
+    assert rows[0] == ("legacy", None)
+    assert sorted(r[0] for r in rows) == sorted(["legacy", "today"] + [f"r{i}" for i in range(5)])
+
+
+def test_concurrent_compaction_does_not_duplicate_rows(tmp_path):
+    partition_dir = _write_files(tmp_path, 200)
+
+    # Both processes start compacting the same partition at the same moment
+    start_at = time.time() + 2
+    code = (
+        "import sys, time\n"
+        "from pathlib import Path\n"
+        "import query_logger\n"
+        "time.sleep(max(0.0, float(sys.argv[3]) - time.time()))\n"
+        "query_logger._compact_partition(sys.argv[1], Path(sys.argv[2]))\n"
+    )
+    processes = [
+        subprocess.Popen(
+            [sys.executable, "-c", code, str(tmp_path), str(partition_dir), str(start_at)],
+            cwd=REPO_ROOT, stderr=subprocess.PIPE, text=True
+        )
+        for _ in range(2)
+    ]
+    for process in processes:
+        _, stderr = process.communicate(timeout=60)
+        assert process.returncode == 0, stderr
+
+    assert len(list(partition_dir.glob("*.parquet"))) == 1
+    assert _count_rows(tmp_path) == (200, 200)
+
+
+def test_compaction_interrupted_after_rename_is_finished(tmp_path):
+    partition_dir = _write_files(tmp_path, 3)
+    inputs = sorted(f.name for f in partition_dir.glob("*.parquet"))
+
+    # The merged file landed, but the process died before removing its inputs
+    con = duckdb.connect()
+    try:
+        con.execute(f"COPY (SELECT * FROM read_parquet('{partition_dir}/*.parquet', hive_partitioning = false)) "
+                    f"TO '{partition_dir}/part_merged.parquet' (FORMAT parquet)")
+    finally:
+        con.close()
+    (partition_dir / ".compact_x.json").write_text(json.dumps({"output": "part_merged.parquet", "inputs": inputs}))
+    (partition_dir / inputs[0]).unlink()
+
+    query_logger._compact_partition(str(tmp_path), partition_dir, merge=False)
+
+    assert [f.name for f in partition_dir.glob("*.parquet")] == ["part_merged.parquet"]
+    assert not list(partition_dir.glob(".compact_*.json"))
+    assert _count_rows(tmp_path) == (3, 3)
+
+
+def test_compaction_interrupted_before_rename_is_undone(tmp_path):
+    partition_dir = _write_files(tmp_path, 3)
+    inputs = sorted(f.name for f in partition_dir.glob("*.parquet"))
+
+    # The process died while writing the merged file
+    (partition_dir / ".compact_x.json").write_text(json.dumps({"output": "part_x.parquet", "inputs": inputs}))
+    (partition_dir / ".compact_x.tmp").write_bytes(b"partial")
+
+    query_logger._compact_partition(str(tmp_path), partition_dir, merge=False)
+
+    assert sorted(f.name for f in partition_dir.glob("*.parquet")) == inputs
+    assert not list(partition_dir.glob(".compact_*"))
+    assert _count_rows(tmp_path) == (3, 3)
@@ -0,0 +1,172 @@
+import duckdb
+import pytest
+import semantic_layer
+
+
+def _write_parquet(path, rows: int) -> None:
+    con = duckdb.connect()
+    try:
+        con.execute(f"COPY (SELECT range AS id, range * 1.5 AS value FROM range({rows})) TO '{path}' (FORMAT parquet)")
+    finally:
+        con.close()
+
+
+def _tool_config(parquet_path, **database) -> dict:
+    return {
+        "llm": {"model": "test/model", "prompt_format": {"hint_style": "sql_comment"}},
+        "database": {"parquet_path": str(parquet_path), "table_name": "data", **database},
+        "semantic_layer": {
+            "auto_queries": [{"label": "count", "query": "SELECT COUNT(*) FROM {query_target}"}],
+            "static_context": ["A hint"]
+        }
+    }
+
+
+@pytest.fixture
+def cache_dir(tmp_path, monkeypatch):
+    cache_dir = tmp_path / "cache"
+    monkeypatch.setattr(semantic_layer, "CONTEXT_CACHE_DIR", cache_dir)
+    monkeypatch.delenv(semantic_layer.NO_CACHE_ENV_VAR, raising=False)
+    return cache_dir
+
+
+def test_fingerprint_tracks_data_file_and_config(tmp_path):
+    data_path = tmp_path / "data.parquet"
+    _write_parquet(data_path, 10)
+    tool_config = _tool_config(data_path)
+    fingerprint = semantic_layer._context_fingerprint(tool_config)
+    assert semantic_layer._context_fingerprint(_tool_config(data_path)) == fingerprint
+
+    _write_parquet(data_path, 11)
+    rewritten = semantic_layer._context_fingerprint(tool_config)
+    assert rewritten != fingerprint
+
+    tool_config["llm"]["prompt_format"]["hint_style"] = "plain"
+    assert semantic_layer._context_fingerprint(tool_config) != rewritten
+
+
+def test_fingerprint_tracks_files_matched_by_a_glob(tmp_path):
+    tool_config = _tool_config(tmp_path / "parts" / "*.parquet")
+    (tmp_path / "parts").mkdir()
+    no_matches = semantic_layer._context_fingerprint(tool_config)
+
+    _write_parquet(tmp_path / "parts" / "a.parquet", 10)
+    one_file = semantic_layer._context_fingerprint(tool_config)
+    assert one_file != no_matches
+
+    _write_parquet(tmp_path / "parts" / "b.parquet", 10)
+    two_files = semantic_layer._context_fingerprint(tool_config)
+    assert two_files != one_file
+
+    (tmp_path / "parts" / "a.parquet").unlink()
+    assert semantic_layer._context_fingerprint(tool_config) not in (one_file, two_files)
+
+    # A glob matching nothing is not the same as a missing file
+    assert no_matches != semantic_layer._context_fingerprint(_tool_config(tmp_path / "parts" / "none.parquet"))
+
+
+def test_fingerprint_ignores_data_files_with_static_schema(tmp_path):
+    (tmp_path / "parts").mkdir()
+    tool_config = _tool_config(tmp_path / "parts" / "*.parquet", static_schema=[["id", "BIGINT"]])
+    tool_config["semantic_layer"]["auto_queries"] = []
+    fingerprint = semantic_layer._context_fingerprint(tool_config)
+
+    _write_parquet(tmp_path / "parts" / "a.parquet", 10)
+    assert semantic_layer._context_fingerprint(tool_config) == fingerprint
+
+
+def test_cached_context_is_rebuilt_when_data_changes(tmp_path, cache_dir):
+    data_path = tmp_path / "data.parquet"
+    _write_parquet(data_path, 10)
+    cache_dir.mkdir()
+    (cache_dir / "sem-0123456789abcdef.json").write_text("{}")
+
+    first = semantic_layer.build_semantic_context(_tool_config(data_path))
+    assert first["auto_query_results"][0]["csv"] == "10"
+    assert semantic_layer.build_semantic_context(_tool_config(data_path)) == first
+
+    _write_parquet(data_path, 25)
+    second = semantic_layer.build_semantic_context(_tool_config(data_path))
+    assert second["auto_query_results"][0]["csv"] == "25"
+    # The entry for the old fingerprint was replaced, not kept alongside
+    assert len(list(cache_dir.glob("sem-*.json"))) == 1
+
+
+def test_precomputed_context_replaces_older_files(tmp_path, cache_dir):
+    data_path = tmp_path / "data.parquet"
+    _write_parquet(data_path, 10)
+    first = semantic_layer.write_prompt_context(_tool_config(data_path), "data")
+
+    _write_parquet(data_path, 25)
+    second = semantic_layer.write_prompt_context(_tool_config(data_path), "data")
+
+    assert second != first
+    assert list(cache_dir.glob("data_context-*.txt")) == [second]
+    assert semantic_layer.load_prompt_context(_tool_config(data_path), "data") == second.read_text()
+
+
+@pytest.fixture
+def typed_parquet(tmp_path):
+    """Several row groups with INT, DOUBLE, DECIMAL, DATE, TIMESTAMP and nullable columns."""
+    path = tmp_path / "typed.parquet"
+    con = duckdb.connect()
+    try:
+        con.execute(f"""
+            COPY (
+                SELECT
+                    range::INTEGER - 500 AS int_col,
+                    range * -0.25 AS double_col,
+                    (range / 7)::DECIMAL(10, 3) AS decimal_col,
+                    DATE '2020-01-01' + range::INTEGER AS date_col,
+                    TIMESTAMP '2020-01-01 00:00:00' + range * INTERVAL 90 MINUTE AS timestamp_col,
+                    CASE WHEN range % 3 = 0 THEN NULL ELSE range::BIGINT END AS nullable_col,
+                    CASE WHEN range < 700 THEN NULL ELSE range::BIGINT END AS null_groups_col,
+                    'type_' || (range % 5) AS varchar_col
+                FROM range(1000)
+            ) TO '{path}' (FORMAT parquet, ROW_GROUP_SIZE 256)
+        """)
+    finally:
+        con.close()
+    return str(path)
+
+
+@pytest.mark.parametrize("items", [
+    "COUNT(*)",
+    "MIN(int_col), MAX(int_col)",
+    "MIN(double_col), MAX(double_col)",
+    "MIN(decimal_col), MAX(decimal_col)",
+    "MIN(date_col), MAX(date_col)",
+    "MIN(timestamp_col), MAX(timestamp_col)",
+    "MIN(nullable_col), MAX(nullable_col)",
+    "MIN(null_groups_col), MAX(null_groups_col)",
+    'COUNT(*), MIN("int_col") AS lo, MAX(timestamp_col) AS hi',
+])
+def test_metadata_rewrite_matches_original_query(typed_parquet, items):
+    con = duckdb.connect()
+    try:
+        query = f"SELECT {items} FROM '{typed_parquet}'"
+        rewritten = semantic_layer._parquet_metadata_query(con, query, typed_parquet)
+        assert rewritten is not None
+
+        original = con.execute(query)
+        expected_rows, expected_description = original.fetchall(), original.description
+        actual = con.execute(rewritten)
+        assert actual.fetchall() == expected_rows
+        assert [(d[0], str(d[1])) for d in actual.description] == [(d[0], str(d[1])) for d in expected_description]
+    finally:
+        con.close()
+
+
+@pytest.mark.parametrize("query_suffix", [
+    "MIN(varchar_col) FROM '{path}'",
+    "COUNT(*) FROM '{path}' WHERE int_col > 0",
+    "SUM(int_col) FROM '{path}'",
+    "COUNT(*) FROM '{path}' GROUP BY varchar_col",
+])
+def test_metadata_rewrite_declines_other_queries(typed_parquet, query_suffix):
+    con = duckdb.connect()
+    try:
+        query = "SELECT " + query_suffix.format(path=typed_parquet)
+        assert semantic_layer._parquet_metadata_query(con, query, typed_parquet) is None
+    finally:
+        con.close()